@@ -1,29 +1,113 @@
+import asyncio
+import logging
 import os
+import queue
+import re
+import shutil
+import threading
+import time
+import uuid
+import zipfile
+from contextlib import asynccontextmanager
 from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
+from xml.sax.saxutils import escape as xml_escape
 
+import aiofiles
+import aiofiles.os
+import anyio
+import orjson
+from cachetools import TTLCache, cached
 from fastapi import FastAPI, Request, HTTPException
-from fastapi.responses import HTMLResponse, FileResponse
+from fastapi.responses import HTMLResponse, FileResponse, ORJSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from pydantic import BaseModel
-from docx import Document
-from docx.shared import Pt, Inches
-from docx.enum.text import WD_ALIGN_PARAGRAPH
+from starlette.concurrency import run_in_threadpool
 
-from transcript import get_clean_transcript
+from transcript import extract_video_id, get_transcript, clean_transcript
 from summarizer import process_transcript
 
-app = FastAPI(title="YouTube Transcript Summarizer")
+# Records are queued by request handlers and written to stderr by a background
+# thread. The queue handler is attached in startup() rather than at import, since
+# spawned workers import this module twice (as __mp_main__ and as main).
+logger = logging.getLogger("ytsum")
+logger.setLevel(logging.INFO)
+logger.propagate = False
+_log_handler: QueueHandler | None = None
+_log_listener: QueueListener | None = None
+
+app = FastAPI(title="YouTube Transcript Summarizer", default_response_class=ORJSONResponse)
 
 # Setup templates and static files
 BASE_DIR = Path(__file__).resolve().parent
 app.mount("/static", StaticFiles(directory=BASE_DIR / "static"), name="static")
 templates = Jinja2Templates(directory=BASE_DIR / "templates")
 
-# Ensure outputs directory exists
 OUTPUTS_DIR = BASE_DIR / "outputs"
-OUTPUTS_DIR.mkdir(exist_ok=True)
+OUTPUTS_DIR_RESOLVED = OUTPUTS_DIR.resolve()
+
+# Download media types by file extension
+_MEDIA_TYPES = {
+    ".docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    ".md": "text/markdown",
+}
+
+# Word package with styles and relationships; only word/document.xml is added per file
+DOCX_TEMPLATE = BASE_DIR / "template.docx"
+DOCUMENT_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"><w:body>'
+    '<w:p><w:pPr><w:pStyle w:val="Title"/><w:jc w:val="center"/></w:pPr>'
+    '<w:r><w:t>YouTube Video Notes</w:t></w:r></w:p>'
+    '<w:p><w:r><w:t>Video ID: {video_id}</w:t></w:r></w:p>'
+    '<w:p><w:r><w:t>URL: https://youtube.com/watch?v={video_id}</w:t></w:r></w:p>'
+    '<w:p><w:r><w:t>Processed: {ts}</w:t></w:r></w:p>'
+    '<w:p/>'
+    '<w:p><w:pPr><w:pStyle w:val="Heading1"/></w:pPr><w:r><w:t>Key Takeaways</w:t></w:r></w:p>'
+    '<w:p><w:r><w:t xml:space="preserve">{takeaways}</w:t></w:r></w:p>'
+    '<w:p/>'
+    '<w:p><w:pPr><w:pStyle w:val="Heading1"/></w:pPr><w:r><w:t>Clean Transcript</w:t></w:r></w:p>'
+    '<w:p><w:r><w:t xml:space="preserve">{transcript}</w:t></w:r></w:p>'
+    '<w:sectPr><w:pgSz w:w="12240" w:h="15840"/>'
+    '<w:pgMar w:top="1440" w:right="1800" w:bottom="1440" w:left="1800" '
+    'w:header="720" w:footer="720" w:gutter="0"/></w:sectPr>'
+    '</w:body></w:document>'
+)
+# Pre-encoded markdown fragments, joined around the per-video values
+_MD_TITLE = b"# YouTube Video Notes\n\n**Video ID:** "
+_MD_URL = b"\n**URL:** https://youtube.com/watch?v="
+_MD_PROCESSED = b"\n**Processed:** "
+_MD_TAKEAWAYS = b"\n\n---\n\n## Key Takeaways\n\n"
+_MD_TRANSCRIPT = b"\n\n---\n\n## Clean Transcript\n\n"
+
+# Characters outside the XML 1.0 Char production, which would corrupt document.xml
+_XML_INVALID_RE = re.compile('[^\t\n\r\x20-\ud7ff\ue000-\ufffd\U00010000-\U0010ffff]')
+
+# Line breaks inside a run, as python-docx renders "\n"
+_DOCX_BREAK = '</w:t><w:br/><w:t xml:space="preserve">'
+
+# Worker threads available for blocking work offloaded from the event loop
+THREADPOOL_TOKENS = 64
+
+# Saved outputs younger than this are returned instead of re-fetching
+OUTPUT_CACHE_TTL = 24 * 60 * 60
+
+# Processed transcripts kept in memory under the same freshness rule as saved outputs
+_clean_cache: TTLCache = TTLCache(maxsize=256, ttl=OUTPUT_CACHE_TTL)
+
+# Processed results keyed by output file stem; files are written on first download
+_pending_outputs: TTLCache = TTLCache(maxsize=512, ttl=3600)
+
+# Characters of notes encoded per streamed chunk of the /process response
+NOTES_CHUNK_SIZE = 64 * 1024
+
+# One lock per video so concurrent duplicate requests are processed once.
+# Entries are dropped when no request holds or waits on them.
+_video_locks: dict[str, asyncio.Lock] = {}
+_video_lock_users: dict[str, int] = {}
 
 
 class ProcessRequest(BaseModel):
@@ -38,111 +122,253 @@ class ProcessResponse(BaseModel):
     docx_filename: str
 
 
-def create_word_document(video_id: str, url: str, takeaways: str, clean_transcript: str, filepath: Path):
-    """Create a Word document with the results."""
-    doc = Document()
+@asynccontextmanager
+async def video_lock(video_id: str):
+    """Hold the per-video lock, removing it once its last user releases it."""
+    lock = _video_locks.setdefault(video_id, asyncio.Lock())
+    _video_lock_users[video_id] = _video_lock_users.get(video_id, 0) + 1
+    try:
+        async with lock:
+            yield
+    finally:
+        _video_lock_users[video_id] -= 1
+        if not _video_lock_users[video_id]:
+            del _video_lock_users[video_id]
+            del _video_locks[video_id]
 
-    # Title
-    title = doc.add_heading('YouTube Video Notes', 0)
-    title.alignment = WD_ALIGN_PARAGRAPH.CENTER
 
-    # Video info
-    doc.add_paragraph(f"Video ID: {video_id}")
-    doc.add_paragraph(f"URL: https://youtube.com/watch?v={video_id}")
-    doc.add_paragraph(f"Processed: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+@cached(_clean_cache, lock=threading.Lock())
+def _cached_clean(video_id: str) -> tuple[str, str]:
+    """Fetch and format a video's transcript, memoized per video ID.
 
-    doc.add_paragraph()  # Spacer
+    Returns:
+        tuple: (summary, notes)
+    """
+    transcript = clean_transcript(get_transcript(video_id))
+    result = process_transcript(transcript)
+    return result['summary'], result['notes']
 
-    # Key Takeaways
-    doc.add_heading('Key Takeaways', level=1)
-    doc.add_paragraph(takeaways)
 
-    doc.add_paragraph()  # Spacer
+def find_recent_output(video_id: str) -> tuple[str, str, str] | None:
+    """Find a saved markdown file for this video younger than OUTPUT_CACHE_TTL.
 
-    # Clean Transcript
-    doc.add_heading('Clean Transcript', level=1)
-    doc.add_paragraph(clean_transcript)
+    Returns:
+        tuple: (file stem, summary, notes), or None if nothing usable is saved
+    """
+    candidates = list(OUTPUTS_DIR.glob(f"{video_id}_*.md"))
+    if not candidates:
+        return None
 
-    doc.save(filepath)
+    latest = max(candidates, key=lambda p: p.stat().st_mtime)
+    if time.time() - latest.stat().st_mtime > OUTPUT_CACHE_TTL:
+        return None
 
+    summary, notes = read_markdown_output(latest)
+    return latest.stem, summary, notes
 
-@app.get("/", response_class=HTMLResponse)
-async def home(request: Request):
-    """Serve the main web interface."""
-    return templates.TemplateResponse("index.html", {"request": request})
 
+def read_markdown_output(filepath: Path) -> tuple[str, str]:
+    """Parse a saved markdown notes file.
 
-@app.post("/process", response_model=ProcessResponse)
-async def process_video(data: ProcessRequest):
-    """Process a YouTube video URL and return summary + notes."""
-    try:
-        # Extract and clean transcript
-        print(f"\n{'='*50}")
-        print(f"Processing: {data.url}")
-        print(f"{'='*50}")
+    Returns:
+        tuple: (summary, notes)
+    """
+    content = filepath.read_text(encoding="utf-8")
+    _, _, rest = content.partition("## Key Takeaways\n\n")
+    summary, _, rest = rest.partition("\n\n---\n\n")
+    _, _, notes = rest.partition("## Clean Transcript\n\n")
+    return summary, notes.removesuffix("\n")
 
-        video_id, transcript = get_clean_transcript(data.url)
-        print(f"Video ID: {video_id}")
-        print(f"Transcript length: {len(transcript)} characters")
 
-        # Format transcript (no AI - fast mode)
-        print("Formatting transcript...")
-        result = process_transcript(transcript)
-        print("Done!")
+def _docx_text(text: str) -> str:
+    """Escape text for a <w:t> element, turning newlines into line breaks."""
+    return xml_escape(_XML_INVALID_RE.sub('', text)).replace("\n", _DOCX_BREAK)
 
-        # Save files
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        md_filename = f"{video_id}_{timestamp}.md"
-        docx_filename = f"{video_id}_{timestamp}.docx"
-        md_filepath = OUTPUTS_DIR / md_filename
-        docx_filepath = OUTPUTS_DIR / docx_filename
 
-        # Save markdown
-        markdown_content = f"""# YouTube Video Notes
+def create_word_document(video_id: str, url: str, takeaways: str, clean_transcript: str, filepath: Path,
+                         processed: datetime):
+    """Create a Word document with the results."""
+    shutil.copyfile(DOCX_TEMPLATE, filepath)
+    document_xml = DOCUMENT_XML.format(
+        video_id=xml_escape(video_id),
+        ts=processed.strftime('%Y-%m-%d %H:%M:%S'),
+        takeaways=_docx_text(takeaways),
+        transcript=_docx_text(clean_transcript),
+    )
+    with zipfile.ZipFile(filepath, 'a', zipfile.ZIP_DEFLATED) as z:
+        z.writestr('word/document.xml', document_xml)
+
 
-**Video ID:** {video_id}
-**URL:** https://youtube.com/watch?v={video_id}
-**Processed:** {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
+def build_markdown(video_id: str, takeaways: str, clean_transcript: str, processed: datetime) -> bytes:
+    """Render the markdown notes file as UTF-8 bytes."""
+    vid = video_id.encode()
+    return b"".join([
+        _MD_TITLE, vid,
+        _MD_URL, vid,
+        _MD_PROCESSED, processed.strftime("%Y-%m-%d %H:%M:%S").encode(),
+        _MD_TAKEAWAYS, takeaways.encode("utf-8"),
+        _MD_TRANSCRIPT, clean_transcript.encode("utf-8"),
+        b"\n",
+    ])
 
----
 
-## Key Takeaways
+def recover_output(stem: str) -> tuple[str, str, str, datetime] | None:
+    """Rebuild a pending output from its saved markdown, e.g. after a restart or on another worker.
 
-{result['summary']}
+    Only stems issued by /process have a markdown file, so nothing is fetched here.
 
----
+    Returns:
+        tuple: (video_id, summary, notes, processed), or None if no markdown is saved
+    """
+    md_filepath = OUTPUTS_DIR / f"{stem}.md"
+    video_id, timestamp = stem[:11], stem[12:]
+    try:
+        processed = datetime.strptime(timestamp, "%Y%m%d_%H%M%S")
+        summary, notes = read_markdown_output(md_filepath)
+    except (ValueError, OSError):
+        return None
+    return video_id, summary, notes, processed
 
-## Clean Transcript
 
-{result['notes']}
-"""
-        md_filepath.write_text(markdown_content, encoding="utf-8")
+def _temp_path(filepath: Path) -> Path:
+    """Hidden sibling path to write into before renaming over filepath."""
+    return filepath.with_name(f".{filepath.name}.{uuid.uuid4().hex}.tmp")
 
-        # Save Word document
-        create_word_document(video_id, data.url, result['summary'], result['notes'], docx_filepath)
 
-        print(f"Saved to: {md_filepath}")
-        print(f"Saved to: {docx_filepath}")
+def save_word_document(video_id: str, takeaways: str, clean_transcript: str, filepath: Path,
+                       processed: datetime):
+    """Create the Word document under a temporary name and move it into place atomically."""
+    tmp_path = _temp_path(filepath)
+    try:
+        url = f"https://youtube.com/watch?v={video_id}"
+        create_word_document(video_id, url, takeaways, clean_transcript, tmp_path, processed)
+        os.replace(tmp_path, filepath)
+    finally:
+        tmp_path.unlink(missing_ok=True)
 
-        # Print to console
-        print(f"\n{'='*50}")
-        print("KEY TAKEAWAYS:")
-        print(f"{'='*50}")
-        print(result['summary'])
-        print(f"{'='*50}\n")
 
-        return ProcessResponse(
-            video_id=video_id,
-            summary=result['summary'],
-            notes=result['notes'],
-            filename=md_filename,
-            docx_filename=docx_filename
-        )
+async def write_bytes_file(filepath: Path, content: bytes):
+    """Atomically write a file without blocking the event loop."""
+    tmp_path = _temp_path(filepath)
+    try:
+        async with aiofiles.open(tmp_path, 'wb') as f:
+            await f.write(content)
+        await aiofiles.os.replace(tmp_path, filepath)
+    finally:
+        if await aiofiles.os.path.exists(tmp_path):
+            await aiofiles.os.remove(tmp_path)
+
+
+async def materialize_output(filepath: Path):
+    """Write the Word document to disk the first time it is downloaded."""
+    if filepath.suffix != ".docx":
+        raise HTTPException(status_code=404, detail="File not found")
+
+    entry = _pending_outputs.get(filepath.stem)
+    if entry is None:
+        entry = await run_in_threadpool(recover_output, filepath.stem)
+        if entry is None:
+            raise HTTPException(status_code=404, detail="File not found")
+        _pending_outputs[filepath.stem] = entry
+
+    video_id, summary, notes, processed = entry
+    async with video_lock(video_id):
+        if filepath.exists():
+            return
+        await run_in_threadpool(save_word_document, video_id, summary, notes, filepath, processed)
+    logger.info("Saved to: %s", filepath)
+
+
+def stream_process_response(video_id: str, summary: str, notes: str, filename: str,
+                            docx_filename: str) -> StreamingResponse:
+    """Stream a ProcessResponse-shaped JSON body, encoding the notes in chunks."""
+    async def body():
+        head = {
+            "video_id": video_id,
+            "summary": summary,
+            "filename": filename,
+            "docx_filename": docx_filename,
+        }
+        # Reopen the object and the notes string after the fixed fields
+        yield orjson.dumps(head)[:-1] + b',"notes":"'
+        for i in range(0, len(notes), NOTES_CHUNK_SIZE):
+            # Strip the quotes orjson adds around each string chunk
+            yield orjson.dumps(notes[i:i + NOTES_CHUNK_SIZE])[1:-1]
+        yield b'"}'
+
+    return StreamingResponse(body(), media_type="application/json")
+
+
+@app.on_event("startup")
+async def startup():
+    """Per-worker initialization: log listener, outputs dir, template cache, threadpool size."""
+    global _log_handler, _log_listener
+    log_queue = queue.SimpleQueue()
+    _log_handler = QueueHandler(log_queue)
+    _log_listener = QueueListener(log_queue, logging.StreamHandler())
+    _log_listener.start()
+    logger.addHandler(_log_handler)
+    OUTPUTS_DIR.mkdir(exist_ok=True)
+    templates.get_template("index.html")
+    anyio.to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_TOKENS
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Detach the queue handler and flush queued log records."""
+    global _log_handler, _log_listener
+    logger.removeHandler(_log_handler)
+    _log_listener.stop()
+    _log_handler = _log_listener = None
+
+
+@app.get("/", response_class=HTMLResponse)
+async def home(request: Request):
+    """Serve the main web interface."""
+    return templates.TemplateResponse("index.html", {"request": request})
+
+
+@app.post("/process", response_model=ProcessResponse, response_class=ORJSONResponse)
+async def process_video(data: ProcessRequest):
+    """Process a YouTube video URL and return summary + notes."""
+    try:
+        # Extract and clean transcript
+        logger.info("Processing: %s", data.url)
+
+        video_id = extract_video_id(data.url)
+        logger.info("Video ID: %s", video_id)
+
+        async with video_lock(video_id):
+            cached = await run_in_threadpool(find_recent_output, video_id)
+            if cached:
+                stem, summary, notes = cached
+                logger.info("Using saved output: %s", stem)
+                processed = datetime.strptime(stem[len(video_id) + 1:], "%Y%m%d_%H%M%S")
+                _pending_outputs[stem] = (video_id, summary, notes, processed)
+                return stream_process_response(video_id, summary, notes, f"{stem}.md", f"{stem}.docx")
+
+            # Fetch and format transcript (no AI - fast mode)
+            logger.info("Formatting transcript...")
+            summary, notes = await run_in_threadpool(_cached_clean, video_id)
+            logger.info("Transcript length: %d characters", len(notes))
+
+            # The markdown is cheap and backs the disk cache; the Word document is
+            # written lazily when first downloaded
+            processed = datetime.now()
+            stem = f"{video_id}_{processed.strftime('%Y%m%d_%H%M%S')}"
+            md_filename = f"{stem}.md"
+            docx_filename = f"{stem}.docx"
+            await write_bytes_file(OUTPUTS_DIR / md_filename, build_markdown(video_id, summary, notes, processed))
+            _pending_outputs[stem] = (video_id, summary, notes, processed)
+
+            logger.info("Key takeaways: %s", summary)
+
+            return stream_process_response(video_id, summary, notes, md_filename, docx_filename)
 
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        print(f"Error: {e}")
+        logger.error("Error: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -150,18 +376,31 @@ async def process_video(data: ProcessRequest):
 async def download_file(filename: str):
     """Download the generated file."""
     filepath = OUTPUTS_DIR / filename
-    if not filepath.exists():
+    media_type = _MEDIA_TYPES.get(os.path.splitext(filename)[1])
+    if media_type is None or not filepath.resolve().is_relative_to(OUTPUTS_DIR_RESOLVED):
         raise HTTPException(status_code=404, detail="File not found")
+    if not os.path.isfile(filepath):
+        await materialize_output(filepath)
 
-    media_type = "application/vnd.openxmlformats-officedocument.wordprocessingml.document" if filename.endswith('.docx') else "text/markdown"
+    # Reuse the stat for the response so the file is only stat'ed once
+    stat = filepath.stat()
+    headers = {
+        "ETag": f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"',
+        "Cache-Control": "public, max-age=86400",
+    }
 
     return FileResponse(
         path=filepath,
         filename=filename,
-        media_type=media_type
+        media_type=media_type,
+        headers=headers,
+        stat_result=stat
     )
 
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # Transcript cleaning is CPU-bound, so scale out with processes.
+    # In production prefer: gunicorn main:app -k uvicorn.workers.UvicornWorker -w $((2*$(nproc)+1))
+    workers = int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 2))
+    uvicorn.run("main:app", host="0.0.0.0", port=8000, workers=workers)
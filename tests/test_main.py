@@ -0,0 +1,90 @@
+import json
+import zipfile
+from datetime import datetime
+from xml.etree import ElementTree
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from main import create_word_document
+
+W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+
+def read_document_text(path):
+    with zipfile.ZipFile(path) as z:
+        names = z.namelist()
+        assert names.count("word/document.xml") == 1
+        root = ElementTree.fromstring(z.read("word/document.xml"))
+    return [t.text or "" for t in root.iter(f"{W_NS}t")]
+
+
+def test_word_document_escapes_markup(tmp_path):
+    path = tmp_path / "notes.docx"
+    create_word_document("abc", "", "<b> & co", "one\n\ntwo", path, datetime(2024, 1, 2, 3, 4, 5))
+
+    texts = read_document_text(path)
+    assert "Processed: 2024-01-02 03:04:05" in texts
+    assert "<b> & co" in texts
+    assert texts[-3:] == ["one", "", "two"]
+
+
+def test_word_document_drops_xml_invalid_characters(tmp_path):
+    path = tmp_path / "notes.docx"
+    create_word_document("abc", "", "ok", "page\x0cbreak \x1b[0m done\ud800", path, datetime(2024, 1, 1))
+
+    assert read_document_text(path)[-1] == "pagebreak [0m done"
+
+
+def test_recover_output_reads_saved_markdown(tmp_path, monkeypatch):
+    monkeypatch.setattr(main, "OUTPUTS_DIR", tmp_path)
+    processed = datetime(2024, 1, 2, 3, 4, 5)
+    stem = "dQw4w9WgXcQ_20240102_030405"
+    (tmp_path / f"{stem}.md").write_bytes(main.build_markdown("dQw4w9WgXcQ", "sum", "a.\n\nb.", processed))
+
+    assert main.recover_output(stem) == ("dQw4w9WgXcQ", "sum", "a.\n\nb.", processed)
+
+
+def test_recover_output_rejects_unissued_stem(tmp_path, monkeypatch):
+    monkeypatch.setattr(main, "OUTPUTS_DIR", tmp_path)
+    monkeypatch.setattr(main, "get_transcript", lambda video_id: pytest.fail("fetched transcript"))
+
+    assert main.recover_output("dQw4w9WgXcQ_20240102_030405") is None
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_save_word_document_leaves_no_temp_files(tmp_path):
+    path = tmp_path / "notes.docx"
+    main.save_word_document("abc", "sum", "text", path, datetime(2024, 1, 1))
+
+    assert [p.name for p in tmp_path.iterdir()] == ["notes.docx"]
+    assert read_document_text(path)[-1] == "text"
+
+
+@pytest.mark.parametrize("snippets", [
+    [],
+    ['Quotes "here", back\\slash\ttab.', "Emoji \U0001F600 and \u00e9 and \u2028 done."] * 5,
+])
+def test_process_streams_valid_json(tmp_path, monkeypatch, snippets):
+    monkeypatch.setattr(main, "OUTPUTS_DIR", tmp_path)
+    monkeypatch.setattr(main, "NOTES_CHUNK_SIZE", 7)
+    monkeypatch.setattr(main, "get_transcript", lambda video_id: snippets)
+    main._clean_cache.clear()
+
+    with TestClient(main.app) as client:
+        response = client.post("/process", json={"url": "https://youtu.be/dQw4w9WgXcQ"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    body = json.loads(response.content)
+    expected = main.ProcessResponse(
+        video_id="dQw4w9WgXcQ",
+        summary="*No AI summary - transcript only mode for speed*",
+        notes=main.clean_transcript(snippets),
+        filename=body["filename"],
+        docx_filename=body["docx_filename"],
+    )
+    assert body == expected.model_dump()
+    assert len(body["notes"]) > main.NOTES_CHUNK_SIZE or not snippets
+    assert body["docx_filename"] == body["filename"].removesuffix(".md") + ".docx"
@@ -0,0 +1,85 @@
+import pytest
+
+from transcript import clean_and_paragraphize, clean_transcript, extract_video_id
+
+
+def test_empty_input():
+    assert clean_and_paragraphize("") == ""
+    assert clean_and_paragraphize("   \n ") == ""
+    assert clean_transcript([]) == ""
+
+
+def test_single_word_fillers_removed_case_insensitively():
+    assert clean_and_paragraphize("Um so uh this is BASICALLY fine") == "so this is fine"
+
+
+def test_filler_substrings_kept():
+    assert clean_and_paragraphize("likely umbrella errand") == "likely umbrella errand"
+
+
+def test_two_word_fillers_removed():
+    assert clean_and_paragraphize("it was, you know, great") == "it was,, great"
+    assert clean_and_paragraphize("I mean I think so") == "I think so"
+
+
+def test_two_word_filler_first_word_alone_kept():
+    assert clean_and_paragraphize("you said I know") == "you said I know"
+
+
+def test_two_word_filler_across_snippet_boundary():
+    assert clean_transcript(["and then you", "know it worked."]) == "and then it worked."
+
+
+def test_fillers_next_to_apostrophes_removed():
+    assert clean_and_paragraphize("'like' it") == "'' it"
+    assert clean_and_paragraphize("um's fine") == "'s fine"
+    assert clean_and_paragraphize("er' ok") == "' ok"
+    assert clean_and_paragraphize("don't I'm") == "don't I'm"
+
+
+def test_whitespace_collapsed():
+    assert clean_and_paragraphize("  a \n\t b  ") == "a b"
+
+
+def test_punctuation_attaches_to_previous_word():
+    assert clean_and_paragraphize("hello , world ! yes ?") == "hello, world! yes?"
+    assert clean_and_paragraphize("um, right") == ", right"
+
+
+def test_sentence_needs_trailing_whitespace():
+    text = "Pi is 3.14 roughly. Yes."
+    assert clean_and_paragraphize(text) == text
+
+
+def test_groups_four_sentences_per_paragraph():
+    text = " ".join(f"S{i}." for i in range(1, 10))
+    assert clean_and_paragraphize(text) == "S1. S2. S3. S4.\n\nS5. S6. S7. S8.\n\nS9."
+
+
+def test_idempotent_on_cleaned_output():
+    once = clean_and_paragraphize("Um one. two? three! four. five")
+    assert clean_and_paragraphize(once) == once
+
+
+@pytest.mark.parametrize("url", [
+    "https://www.youtube.com/watch?v=dQw4w9WgXcQ",
+    "https://www.youtube.com/watch?v=dQw4w9WgXcQ&t=42s",
+    "https://youtu.be/dQw4w9WgXcQ?si=abc",
+    "https://www.youtube.com/embed/dQw4w9WgXcQ",
+    "https://youtube.com/shorts/dQw4w9WgXcQ",
+    "dQw4w9WgXcQ",
+    "dQw4w9WgXcQ\n",
+    "  dQw4w9WgXcQ ",
+])
+def test_extract_video_id(url):
+    assert extract_video_id(url) == "dQw4w9WgXcQ"
+
+
+@pytest.mark.parametrize("url", [
+    "dQw4w9WgXcQx",
+    "https://example.com/watch?v=dQw4w9WgXcQ",
+    "",
+])
+def test_extract_video_id_rejects(url):
+    with pytest.raises(ValueError):
+        extract_video_id(url)
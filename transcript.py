@@ -1,8 +1,35 @@
 import os
 import re
+import threading
+from collections.abc import Iterable
+
+import re2
 from youtube_transcript_api import YouTubeTranscriptApi
 from youtube_transcript_api.proxies import GenericProxyConfig
 
+# Patterns are compiled once at import time with RE2, which scans in linear time
+# Group 1 is an ID taken from a URL, group 2 a bare video ID
+_VIDEO_ID_RE = re2.compile(
+    r'(?:youtube\.com\/(?:watch\?v=|embed\/|shorts\/)|youtu\.be\/)([a-zA-Z0-9_-]{11})'
+    r'|^([a-zA-Z0-9_-]{11})$'
+)
+# Filler words dropped from transcripts (case insensitive)
+FILLERS = frozenset({"um", "uh", "er", "ah", "like", "basically", "actually", "literally"})
+# Two-word fillers, keyed by their first word
+FILLER_PAIRS = {"you": "know", "i": "mean"}
+SENTENCE_END = frozenset(".!?")
+# Punctuation that attaches to the preceding word
+ATTACHED_PUNCT = frozenset(".,!?")
+SENTENCES_PER_PARAGRAPH = 4
+# Each match is (leading whitespace, word or single punctuation mark). Uses the
+# stdlib engine: the pattern cannot backtrack, and findall builds every token
+# in one C call where the re2 wrapper pays Python overhead per match.
+_TOKEN_RE = re.compile(r"(\s*)(\w+|[^\w\s])")
+
+# YouTubeTranscriptApi (and the requests.Session it creates) is not thread-safe,
+# so each worker thread keeps its own client and reuses its keep-alive connections
+_thread_local = threading.local()
+
 
 def get_proxy_config():
     """Get proxy configuration from environment variables."""
@@ -16,31 +43,31 @@ def get_proxy_config():
     return None
 
 
+def get_api() -> YouTubeTranscriptApi:
+    """Get this thread's API client, created once so its session is reused."""
+    api = getattr(_thread_local, "api", None)
+    if api is None:
+        api = YouTubeTranscriptApi(proxy_config=get_proxy_config())
+        _thread_local.api = api
+    return api
+
+
 def extract_video_id(url: str) -> str:
     """Extract YouTube video ID from various URL formats."""
-    patterns = [
-        r'(?:youtube\.com\/watch\?v=|youtu\.be\/|youtube\.com\/embed\/)([a-zA-Z0-9_-]{11})',
-        r'(?:youtube\.com\/shorts\/)([a-zA-Z0-9_-]{11})',
-        r'^([a-zA-Z0-9_-]{11})$'  # Direct video ID
-    ]
-
-    for pattern in patterns:
-        match = re.search(pattern, url)
-        if match:
-            return match.group(1)
+    # RE2's $ does not match before a trailing newline like re's does, so strip first
+    match = _VIDEO_ID_RE.search(url.strip())
+    if match:
+        return match.group(1) or match.group(2)
 
     raise ValueError(f"Could not extract video ID from URL: {url}")
 
 
-def get_transcript(video_id: str) -> list[dict]:
+def get_transcript(video_id: str) -> list[str]:
     """Fetch transcript from YouTube."""
-    proxy_config = get_proxy_config()
-    api = YouTubeTranscriptApi(proxy_config=proxy_config)
     try:
-        transcript = api.fetch(video_id)
-        # Convert to list of dicts for compatibility
-        return [{"text": snippet.text, "start": snippet.start, "duration": snippet.duration}
-                for snippet in transcript]
+        transcript = get_api().fetch(video_id)
+        # Only the text is used downstream
+        return [snippet.text for snippet in transcript]
     except Exception as e:
         error_msg = str(e).lower()
         if "disabled" in error_msg:
@@ -51,52 +78,62 @@ def get_transcript(video_id: str) -> list[dict]:
             raise ValueError(f"Failed to fetch transcript: {e}")
 
 
-def clean_transcript(transcript: list[dict]) -> str:
-    """Clean and format the transcript."""
-    # Filler words to remove
-    fillers = [
-        r'\b(um|uh|er|ah|like|you know|i mean|basically|actually|literally)\b',
-    ]
-
-    # Combine all text segments
-    full_text = ' '.join(segment['text'] for segment in transcript)
-
-    # Remove filler words (case insensitive)
-    for filler in fillers:
-        full_text = re.sub(filler, '', full_text, flags=re.IGNORECASE)
-
-    # Clean up whitespace
-    full_text = re.sub(r'\s+', ' ', full_text).strip()
+def _strip_fillers(text: str):
+    """Tokenize text, yielding (preceded_by_space, token) pairs without fillers."""
+    held = None  # first word of a possible two-word filler
+    gap = False  # whitespace left behind by dropped fillers
+
+    for space, token in _TOKEN_RE.findall(text):
+        spaced = gap or space != ''
+        lower = token.lower()
+
+        if held is not None:
+            if space and lower == FILLER_PAIRS[held[1].lower()]:
+                gap = held[0]
+                held = None
+                continue
+            yield held
+            held = None
+
+        if lower in FILLER_PAIRS:
+            held = (spaced, token)
+            gap = False
+        elif lower in FILLERS:
+            gap = spaced
+        else:
+            yield spaced, token
+            gap = False
 
-    # Fix common transcript issues
-    full_text = re.sub(r'\s+([.,!?])', r'\1', full_text)  # Remove space before punctuation
+    if held is not None:
+        yield held
 
-    # Split into sentences and rejoin with proper formatting
-    sentences = re.split(r'(?<=[.!?])\s+', full_text)
 
-    # Group sentences into paragraphs (roughly 3-5 sentences each)
-    paragraphs = []
-    current_paragraph = []
+def clean_and_paragraphize(text: str) -> str:
+    """Remove fillers, normalize spacing and group sentences into paragraphs."""
+    sentences = []
+    sentence = []
+    ended = False  # last token closed a sentence
 
-    for sentence in sentences:
-        current_paragraph.append(sentence)
-        if len(current_paragraph) >= 4:
-            paragraphs.append(' '.join(current_paragraph))
-            current_paragraph = []
+    for spaced, token in _strip_fillers(text):
+        # A sentence only ends when its punctuation is followed by whitespace
+        if ended and spaced and token not in ATTACHED_PUNCT:
+            sentences.append(''.join(sentence))
+            sentence.clear()
 
-    if current_paragraph:
-        paragraphs.append(' '.join(current_paragraph))
+        if spaced and sentence and token not in ATTACHED_PUNCT:
+            sentence.append(' ')
+        sentence.append(token)
+        ended = token in SENTENCE_END
 
-    return '\n\n'.join(paragraphs)
+    if sentence:
+        sentences.append(''.join(sentence))
 
+    n = SENTENCES_PER_PARAGRAPH
+    return '\n\n'.join(' '.join(sentences[i:i + n]) for i in range(0, len(sentences), n))
 
-def get_clean_transcript(url: str) -> tuple[str, str]:
-    """Main function to get and clean transcript from a YouTube URL.
 
-    Returns:
-        tuple: (video_id, cleaned_transcript)
-    """
-    video_id = extract_video_id(url)
-    raw_transcript = get_transcript(video_id)
-    cleaned = clean_transcript(raw_transcript)
-    return video_id, cleaned
+def clean_transcript(transcript_texts: Iterable[str]) -> str:
+    """Clean and format the transcript."""
+    # Combine all text segments
+    full_text = ' '.join(transcript_texts)
+    return clean_and_paragraphize(full_text)